@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from tms import pipeline
+
+
+def test_clean_amounts_strips_currency_and_separators():
+    table = pd.DataFrame({'item': ['a', 'b'], 'amount': ['$1,200.50', '300']})
+    assert pipeline.clean_amounts([table]) == pytest.approx(1500.5)
+
+
+def test_clean_amounts_ignores_missing_and_unparseable_cells():
+    table = pd.DataFrame({'amount': ['10', None, 'n/a', '']})
+    assert pipeline.clean_amounts([table]) == pytest.approx(10)
+
+
+def test_clean_amounts_sums_across_tables_and_columns():
+    first = pd.DataFrame({'unit price': ['5'], 'total': ['15']})
+    second = pd.DataFrame({'description': ['x'], 'amount': ['$20']})
+    assert pipeline.clean_amounts([first, second]) == pytest.approx(40)
+
+
+def test_clean_amounts_returns_none_without_amount_columns():
+    assert pipeline.clean_amounts([pd.DataFrame({'item': ['a'], 'qty': ['1']})]) is None
+
+
+def test_clean_amounts_converts_columns_to_arrow_numbers():
+    table = pd.DataFrame({'amount': ['1.50', '2']})
+    pipeline.clean_amounts([table])
+    assert isinstance(table['amount'].dtype, pd.ArrowDtype)
+    assert table['amount'].tolist() == [1.5, 2.0]
@@ -0,0 +1,31 @@
+from tms import pipeline
+
+
+def test_condense_document_keeps_text_within_budget_untouched():
+    pages = ['ACME Ltd\nItem Qty Amount\nbolts 2 10\nPage footer'] * 4
+    assert pipeline.condense_document(pages) == '\n'.join(pages)
+
+
+def test_condense_document_strips_boilerplate_only_at_page_edges(monkeypatch):
+    monkeypatch.setattr(pipeline, 'MAX_DOCUMENT_TOKENS', 30)
+    pages = [f'ACME Ltd\nline {i} ACME Ltd\nPage footer' for i in range(4)]
+    text = pipeline.condense_document(pages)
+    assert text.splitlines() == [f'line {i} ACME Ltd' for i in range(4)]
+
+
+def test_condense_document_keeps_repeated_header_inside_pages(monkeypatch):
+    monkeypatch.setattr(pipeline, 'MAX_DOCUMENT_TOKENS', 40)
+    pages = [f'ACME Ltd\nItem Qty Amount\nbolts {i} 10\nPage footer' for i in range(4)]
+    text = pipeline.condense_document(pages)
+    assert 'Item Qty Amount' in text
+    assert 'ACME Ltd' not in text and 'Page footer' not in text
+
+
+def test_condense_document_keeps_figures_then_head_and_tail(monkeypatch):
+    monkeypatch.setattr(pipeline, 'MAX_DOCUMENT_TOKENS', 10)
+    pages = ['intro words only\n' + '\n'.join(f'row {i} 100' for i in range(20))]
+    text = pipeline.condense_document(pages)
+    assert 'intro words only' not in text
+    assert text.startswith('row 0 100')
+    assert text.endswith('row 19 100')
+    assert '\n...\n' in text
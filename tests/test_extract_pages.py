@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+
+from tms import pipeline
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        if self.text is None:
+            raise ValueError('malformed page')
+        return self.text
+
+    def extract_tables(self):
+        return []
+
+
+class FakePDF:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def test_extract_page_range_reports_skipped_page_numbers(monkeypatch):
+    opened = {}
+
+    def fake_open_pdf(path, pages=None):
+        opened['pages'] = pages
+        return FakePDF([FakePage('third'), FakePage(None), FakePage('fifth')])
+
+    monkeypatch.setattr(pipeline, 'open_pdf', fake_open_pdf)
+
+    pages, skipped = pipeline.extract_page_range('budget.pdf', 2, 5)
+
+    assert opened['pages'] == [3, 4, 5]
+    assert pages == [('third', []), ('fifth', [])]
+    assert skipped == [4]
+
+
+class FakePdfplumber:
+    def __init__(self):
+        self.opened = []
+
+    def open(self, path, pages=None):
+        self.opened.append(pages)
+        return FakePDF([FakePage('fallback')])
+
+
+def test_open_pdf_uses_pdfplumber_without_the_rust_port(monkeypatch):
+    fallback = FakePdfplumber()
+    monkeypatch.setattr(pipeline, 'pdfplumber_rs', None)
+    monkeypatch.setattr(pipeline, 'pdfplumber', fallback)
+
+    pipeline.open_pdf('budget.pdf', pages=[1])
+
+    assert fallback.opened == [[1]]
+
+
+def test_open_pdf_falls_back_when_the_rust_port_has_another_api(monkeypatch):
+    fallback = FakePdfplumber()
+    monkeypatch.setattr(pipeline, 'pdfplumber_rs', SimpleNamespace(open_document=lambda path: None))
+    monkeypatch.setattr(pipeline, 'pdfplumber', fallback)
+
+    assert not pipeline.rust_backend_available()
+    pipeline.open_pdf('budget.pdf')
+
+    assert fallback.opened == [None]
+
+
+def test_open_pdf_falls_back_when_the_rust_port_fails_to_open(monkeypatch):
+    def failing_open(path, pages=None):
+        raise TypeError('unexpected keyword argument')
+
+    fallback = FakePdfplumber()
+    monkeypatch.setattr(pipeline, 'pdfplumber_rs', SimpleNamespace(PDF=SimpleNamespace(open=failing_open)))
+    monkeypatch.setattr(pipeline, 'pdfplumber', fallback)
+
+    pipeline.open_pdf('budget.pdf', pages=[2, 3])
+
+    assert fallback.opened == [[2, 3]]
+
+
+def test_open_pdf_prefers_a_working_rust_port(monkeypatch):
+    rust_pdf = FakePDF([FakePage('rust')])
+    fallback = FakePdfplumber()
+    monkeypatch.setattr(pipeline, 'pdfplumber_rs', SimpleNamespace(PDF=SimpleNamespace(open=lambda path, pages=None: rust_pdf)))
+    monkeypatch.setattr(pipeline, 'pdfplumber', fallback)
+
+    assert pipeline.open_pdf('budget.pdf') is rust_pdf
+    assert fallback.opened == []
+
+
+class FakeRustPDF:
+    # Seven-page document whose fifth page is malformed
+    texts = ['page 1', 'page 2', 'page 3', 'page 4', None, 'page 6', 'page 7']
+
+    @classmethod
+    def open(cls, path, pages=None):
+        numbers = pages if pages is not None else range(1, len(cls.texts) + 1)
+        return FakePDF([FakePage(cls.texts[number - 1]) for number in numbers])
+
+
+def test_extract_pages_keeps_order_and_skipped_pages_across_threads(monkeypatch):
+    monkeypatch.setattr(pipeline, 'pdfplumber_rs', SimpleNamespace(PDF=FakeRustPDF))
+    monkeypatch.setattr(pipeline.os, 'cpu_count', lambda: 3)
+
+    pages, skipped = pipeline.extract_pages('budget.pdf')
+
+    assert [text for text, _ in pages] == ['page 1', 'page 2', 'page 3', 'page 4', 'page 6', 'page 7']
+    assert skipped == [5]
+
+
+def test_extract_pages_reads_sequentially_with_pdfplumber(monkeypatch):
+    opened = []
+
+    def fake_open_pdf(path, pages=None):
+        opened.append(pages)
+        return FakePDF([FakePage('only'), FakePage(None)])
+
+    monkeypatch.setattr(pipeline, 'pdfplumber_rs', None)
+    monkeypatch.setattr(pipeline, 'open_pdf', fake_open_pdf)
+
+    pages, skipped = pipeline.extract_pages('budget.pdf')
+
+    assert opened == [None]
+    assert pages == [('only', [])]
+    assert skipped == [2]
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from tms import pipeline
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline.tempfile, 'tempdir', str(tmp_path))
+    return tmp_path
+
+
+def test_extract_pdf_merges_tables_sharing_a_header(monkeypatch):
+    pages = [
+        ('page one', [[['Item', 'Amount'], ['bolts', '10']]]),
+        ('page two', [[['Item', 'Amount'], ['nuts', '5']], [['Note', None], ['x', 'y']]]),
+    ]
+    monkeypatch.setattr(pipeline, 'extract_pages', lambda path: (pages, [3]))
+
+    tables, text_parts, skipped = pipeline.extract_pdf(b'%PDF-')
+
+    assert text_parts == ['page one', 'page two']
+    assert skipped == [3]
+    assert len(tables) == 2
+    assert list(tables[0].columns) == ['item', 'amount']
+    assert tables[0]['item'].tolist() == ['bolts', 'nuts']
+    assert list(tables[1].columns) == ['note', 'unnamed']
+
+
+def test_extract_pdf_deduplicates_headers_after_lowercasing(monkeypatch):
+    pages = [('', [[['Amount', 'amount', None, None], ['1', '2', '3', '4']]])]
+    monkeypatch.setattr(pipeline, 'extract_pages', lambda path: (pages, []))
+
+    tables, _, _ = pipeline.extract_pdf(b'%PDF-')
+
+    assert list(tables[0].columns) == ['amount', 'amount.1', 'unnamed', 'unnamed.1']
+
+
+def test_extract_pdf_skips_header_only_tables(monkeypatch):
+    pages = [('text', [[['Item', 'Amount']], []])]
+    monkeypatch.setattr(pipeline, 'extract_pages', lambda path: (pages, []))
+
+    tables, _, _ = pipeline.extract_pdf(b'%PDF-')
+
+    assert tables == []
+
+
+def test_extract_pdf_passes_the_upload_as_a_file_and_removes_it(temp_dir, monkeypatch):
+    seen = {}
+
+    def fake_extract_pages(path):
+        with open(path, 'rb') as pdf_file:
+            seen['data'] = pdf_file.read()
+        return [], []
+
+    monkeypatch.setattr(pipeline, 'extract_pages', fake_extract_pages)
+
+    pipeline.extract_pdf(b'%PDF-1.4 data')
+
+    assert seen['data'] == b'%PDF-1.4 data'
+    assert os.listdir(temp_dir) == []
+
+
+def test_extract_pdf_removes_temp_file_when_parsing_fails(temp_dir, monkeypatch):
+    def failing_extract_pages(path):
+        raise RuntimeError('broken pdf')
+
+    monkeypatch.setattr(pipeline, 'extract_pages', failing_extract_pages)
+
+    with pytest.raises(RuntimeError):
+        pipeline.extract_pdf(b'%PDF-')
+    assert os.listdir(temp_dir) == []
+
+
+def test_extract_pdf_removes_temp_file_when_writing_fails(temp_dir):
+    with pytest.raises(TypeError):
+        pipeline.extract_pdf('not bytes')
+    assert os.listdir(temp_dir) == []
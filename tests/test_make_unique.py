@@ -0,0 +1,13 @@
+from tms import pipeline
+
+
+def test_make_unique_numbers_repeated_names_in_order():
+    assert pipeline.make_unique(['item', 'amount', 'amount', 'item', 'amount']) == ['item', 'amount', 'amount.1', 'item.1', 'amount.2']
+
+
+def test_make_unique_strips_whitespace_before_comparing():
+    assert pipeline.make_unique(['amount', ' amount ']) == ['amount', 'amount.1']
+
+
+def test_make_unique_leaves_unique_names_alone():
+    assert pipeline.make_unique(['item', 'qty', 'price']) == ['item', 'qty', 'price']
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tms import pipeline
+
+
+class FakeClient:
+    def __init__(self, events):
+        self.events = events
+
+    def generate_stream(self, **kwargs):
+        return iter(self.events)
+
+
+def test_stream_analysis_yields_text_and_records_finish_reason():
+    client = FakeClient([
+        SimpleNamespace(event_type='stream-start'),
+        SimpleNamespace(event_type='text-generation', text='Pricing: '),
+        SimpleNamespace(event_type='text-generation', text='fair.'),
+        SimpleNamespace(event_type='stream-end', finish_reason='COMPLETE'),
+    ])
+    outcome = {}
+
+    assert ''.join(pipeline.stream_analysis(client, 'model', 'text', outcome)) == 'Pricing: fair.'
+    assert outcome == {'finish_reason': 'COMPLETE'}
+
+
+def test_stream_analysis_raises_on_stream_error():
+    client = FakeClient([
+        SimpleNamespace(event_type='text-generation', text='Pricing'),
+        SimpleNamespace(event_type='stream-error', err='overloaded'),
+    ])
+    outcome = {}
+
+    with pytest.raises(RuntimeError, match='overloaded'):
+        list(pipeline.stream_analysis(client, 'model', 'text', outcome))
+    assert 'finish_reason' not in outcome
@@ -0,0 +1,237 @@
+# PDF extraction, amount checking and Cohere prompting for the document review app.
+# Kept free of Streamlit so the app only wires these steps to the page.
+import os
+import re
+import tempfile
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Counter, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cohere
+import pdfplumber
+import pandas as pd
+
+# Optional fast path: the Rust-backed pdfplumber port is not in requirements.txt and is only
+# used when installed separately. Its PDF.open(path, pages=...) / pages / extract_text /
+# extract_tables API is assumed to mirror pdfplumber's; anything else falls back to pdfplumber.
+try:
+    import pdfplumber_rs  # type: ignore[import-not-found]
+except ImportError:
+    pdfplumber_rs = None
+
+# Text and tables extracted from a single page
+Page = Tuple[Optional[str], List[List[List[Optional[str]]]]]
+
+# Translation table that strips currency symbols and thousands separators in one pass
+AMOUNT_CHARS_TABLE = str.maketrans('', '', '$,')
+
+# Pattern for column names that might contain amounts
+AMOUNT_COLUMN_RE = re.compile(r'amount|price|total', re.IGNORECASE)
+
+# Pattern for the total amount stated in the document text
+TOTAL_RE = re.compile(r'Total Amount.*?([\d,\.]+)', re.IGNORECASE)
+
+# Budget for the document part of the Cohere prompt, estimated at ~4 characters per token
+MAX_DOCUMENT_TOKENS = 6000
+CHARS_PER_TOKEN = 4
+
+# Lines heading or closing more than this share of pages are treated as headers/footers
+BOILERPLATE_PAGE_SHARE = 0.3
+
+# Lines worth keeping when the document has to be cut down: figures and amount keywords
+RELEVANT_LINE_RE = re.compile(r'\d|amount|price|total', re.IGNORECASE)
+
+# Function to make column names unique
+def make_unique(columns: Iterable[Optional[str]]) -> List[str]:
+    names = pd.Series(list(columns), dtype=object).astype(str).str.strip()
+    occurrence = names.groupby(names, sort=False).cumcount()
+    return names.where(occurrence == 0, names + "." + occurrence.astype(str)).tolist()
+
+# Function to check whether the Rust port is installed and exposes the entry point we call
+def rust_backend_available() -> bool:
+    return pdfplumber_rs is not None and callable(getattr(getattr(pdfplumber_rs, 'PDF', None), 'open', None))
+
+# Function to open a PDF file with the fastest available backend,
+# optionally limited to the given 1-based page numbers
+def open_pdf(path: str, pages: Optional[List[int]] = None) -> Any:
+    if rust_backend_available():
+        # The optional backend must never take down the default path, so any failure to open
+        # the file or a handle without the page list / context manager falls back to pdfplumber
+        try:
+            pdf = pdfplumber_rs.PDF.open(path, pages=pages)
+            if hasattr(pdf, 'pages') and hasattr(pdf, '__enter__'):
+                return pdf
+        except Exception:
+            pass
+    return pdfplumber.open(path, pages=pages)
+
+# Function to extract (text, tables) for the pages in [start, stop), or for every page when no range is given,
+# along with the 1-based numbers of pages that had to be skipped.
+# Each call opens its own handle because parser state is not safe to share between threads.
+def extract_page_range(path: str, start: int = 0, stop: Optional[int] = None) -> Tuple[List[Page], List[int]]:
+    page_numbers = None if stop is None else list(range(start + 1, stop + 1))
+    results = []
+    skipped = []
+    with open_pdf(path, pages=page_numbers) as pdf:
+        for page_number, page in enumerate(pdf.pages, start=start + 1):
+            # Skip pages the parser cannot make sense of instead of failing the whole document
+            try:
+                results.append((page.extract_text(), page.extract_tables()))
+            except ValueError:
+                skipped.append(page_number)
+    return results, skipped
+
+# Function to extract (text, tables) for every page in order, plus the numbers of skipped pages.
+# pdfplumber is pure Python and holds the GIL, so it gets a single sequential pass;
+# only the Rust port parses outside the GIL and is worth spreading across threads.
+def extract_pages(path: str) -> Tuple[List[Page], List[int]]:
+    if not rust_backend_available():
+        return extract_page_range(path)
+
+    with open_pdf(path) as pdf:
+        page_count = len(pdf.pages)
+    if page_count == 0:
+        return [], []
+
+    workers = min(os.cpu_count() or 1, page_count)
+    chunk_size = -(-page_count // workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(lambda start: extract_page_range(path, start, min(start + chunk_size, page_count)), range(0, page_count, chunk_size))
+        pages = []
+        skipped = []
+        for chunk_pages, chunk_skipped in chunks:
+            pages.extend(chunk_pages)
+            skipped.extend(chunk_skipped)
+        return pages, skipped
+
+# Function to extract the tables and page texts of an uploaded PDF, plus the numbers of skipped pages
+def extract_pdf(pdf_bytes: bytes) -> Tuple[List[pd.DataFrame], List[str], List[int]]:
+    # Hand the parser a file path so it reads pages from disk as it goes; the upload bytes
+    # themselves stay in memory with the caller (and in Streamlit's cache)
+    pdf_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+    try:
+        with pdf_file:
+            pdf_file.write(pdf_bytes)
+        pages, skipped_pages = extract_pages(pdf_file.name)
+    finally:
+        os.remove(pdf_file.name)
+
+    table_rows: Dict[Tuple[Optional[str], ...], List[List[Optional[str]]]] = {}
+    text_parts = []
+    for page_text, page_tables in pages:
+        if page_text:
+            text_parts.append(page_text)
+
+        # Rows of tables sharing a header (e.g. one table continued across pages) go into a single list
+        for table in page_tables:
+            if len(table) > 1 and len(table[0]) > 0:
+                table_rows.setdefault(tuple(table[0]), []).extend(table[1:])
+
+    # Build one DataFrame per distinct header rather than one per extracted table
+    tables = []
+    for header, rows in table_rows.items():
+        columns = [str("Unnamed" if col is None else col).strip().lower() for col in header]
+        if len(set(columns)) < len(columns):
+            columns = make_unique(columns)
+        tables.append(pd.DataFrame.from_records(rows, columns=columns))
+
+    return tables, text_parts, skipped_pages
+
+# Function to convert the amount-like columns of each table to numbers and sum them,
+# returning None when no table has such a column
+def clean_amounts(tables: List[pd.DataFrame]) -> Optional[float]:
+    total = 0.0
+    amount_columns_found = False
+    for table in tables:
+        # Identify columns that might contain amounts
+        amount_columns = [col for col in table.columns if AMOUNT_COLUMN_RE.search(col)]
+        if not amount_columns:
+            continue
+
+        amount_columns_found = True
+        # Arrow-backed strings and doubles keep cleaning and summing in contiguous Arrow buffers
+        # instead of per-cell Python objects; the sums then run on Arrow's compute kernels
+        for col in amount_columns:
+            table[col] = pd.to_numeric(table[col].astype('string[pyarrow]').str.translate(AMOUNT_CHARS_TABLE), errors='coerce', dtype_backend='pyarrow')
+        total += table[amount_columns].sum(numeric_only=True).sum()
+
+    return total if amount_columns_found else None
+
+COHERE_MODEL = 'command-xlarge-nightly'
+# Bump whenever the prompt changes so stale analyses are not served from the cache
+PROMPT_VERSION = 1
+
+# Static instructions for the Cohere review; the document text is appended per request
+PROMPT_HEADER = (
+    "You are an expert document reviewer. Look at the document and find key issues with pricing and any potential problems that could affect the project. "
+    "For pricing, compare the rates with normal market prices and note if anything is too high or too low. For potential problems, mention any missing details or risks. For market Comparison, Make a comparison between the quoted prices and the typical market rates for similar items or services. Highlight any significant discrepancies and provide reasoning if possible.\n\n"
+    "Format your output like this:\n"
+    "- **Pricing**: Briefly check if the price is fair compared to the market. Point out if it's too expensive or too cheap.\n"
+    "- **Market Comparison**: Comparison of prices with market norms, including whether any items are priced unusually high or low. Each subsection should be within 1-2 lines.\n\n"
+    "- **Potential Problems**: List any issues like missing information, risks to the project, or things that could cause delays.\n\n"
+    "Example:\n"
+    "- **Pricing**: Lumber is 3% more expensive than usual, and the excavator rental is too cheap by 10%.\n"
+    "- **Market Comparison**: The cost of materials like steel is 10% higher than the market price due to a supplier-specific markup."
+    "- **Potential Problems**: The budget might not include extra fees for special permits. Soil test results are unclear, which could affect the foundation."
+    "\n\nDocument:\n"
+)
+
+# Function to hash the document text into a compact cache key
+def hash_text(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8')).hexdigest()
+
+# Function to shrink the page texts to the prompt budget when they exceed it: drop repeated
+# page headers/footers, then keep only lines with figures, then keep the head and tail of what remains
+def condense_document(pages: List[str]) -> str:
+    text = '\n'.join(pages)
+    max_chars = MAX_DOCUMENT_TOKENS * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    page_lines = [page.splitlines() for page in pages]
+    edge_lines: Counter[str] = Counter()
+    for lines in page_lines:
+        if lines:
+            edge_lines.update({lines[0].strip(), lines[-1].strip()})
+    boilerplate = {line for line, count in edge_lines.items() if count > 1 and count > BOILERPLATE_PAGE_SHARE * len(pages)}
+
+    # Only a page's own first and last lines are dropped; the same text elsewhere on a page is kept
+    lines = []
+    for page in page_lines:
+        if page and page[0].strip() in boilerplate:
+            page = page[1:]
+        if page and page[-1].strip() in boilerplate:
+            page = page[:-1]
+        lines.extend(page)
+    text = '\n'.join(lines)
+
+    if len(text) > max_chars:
+        text = '\n'.join(line for line in lines if RELEVANT_LINE_RE.search(line))
+    if len(text) > max_chars:
+        half = max_chars // 2
+        text = text[:half] + '\n...\n' + text[-half:]
+    return text
+
+# Function to stream the Cohere analysis of the document text as it is generated.
+# Raises if Cohere reports an error mid-stream; the finish reason of the stream is stored
+# in `outcome` so callers can tell a complete answer from a cut-off one.
+def stream_analysis(client: cohere.Client, model_name: str, text_content: str, outcome: Dict[str, Optional[str]]) -> Iterator[str]:
+    stream = client.generate_stream(
+        model=model_name,
+        prompt=PROMPT_HEADER + text_content,
+        max_tokens=4096,
+        temperature=0.7,
+        k=0,
+        p=0.75,
+        frequency_penalty=0,
+        presence_penalty=0,
+        stop_sequences=["--END--"],
+        return_likelihoods='NONE'
+    )
+    for event in stream:
+        if event.event_type == 'text-generation':
+            yield event.text
+        elif event.event_type == 'stream-error':
+            raise RuntimeError(f"Cohere stopped generating the analysis: {event.err}")
+        elif event.event_type == 'stream-end':
+            outcome['finish_reason'] = event.finish_reason